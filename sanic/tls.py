@@ -1,7 +1,17 @@
 import os
 import ssl
 
-from typing import Iterable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from sanic.log import logger
 
@@ -16,6 +26,12 @@ CIPHERS_TLS12 = [
     "ECDHE-RSA-AES256-GCM-SHA384",
     "ECDHE-RSA-AES128-GCM-SHA256",
 ]
+_CIPHER_STR = ":".join(CIPHERS_TLS12)
+_ALPN = ("http/1.1",)
+_EMPTY_SANIC: dict = {}  # Read-only default for contexts without sanic attrs
+
+# Maximum number of server names remembered by each CertSelector
+SNI_CACHE_SIZE = 1024
 
 
 def create_context(
@@ -26,24 +42,50 @@ def create_context(
     """Create a context with secure crypto and HTTP/1.1 in protocols."""
     context = ssl.create_default_context(purpose=ssl.Purpose.CLIENT_AUTH)
     context.minimum_version = ssl.TLSVersion.TLSv1_2
-    context.set_ciphers(":".join(CIPHERS_TLS12))
-    context.set_alpn_protocols(["http/1.1"])
+    context.set_ciphers(_CIPHER_STR)
+    context.set_alpn_protocols(_ALPN)
     context.sni_callback = server_name_callback
     if certfile and keyfile:
         context.load_cert_chain(certfile, keyfile, password)
     return context
 
 
+@lru_cache(maxsize=256)
+def _parse_cert(
+    certfile: str, stat_key: Tuple[int, ...]
+) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]]:
+    """Decode the SubjectAltNames and the subject fields of a certificate
+    file. Cached by file identity (see _stat_key) so that a certificate is
+    not decoded again if loaded more than once."""
+    cert = ssl._ssl._test_decode_cert(certfile)  # type: ignore
+    names = tuple(
+        name
+        for t, name in cert["subjectAltName"]
+        if t in ["DNS", "IP Address"]
+    )
+    subject = tuple(pair for item in cert["subject"] for pair in item)
+    return names, subject
+
+
+def _stat_key(path: str) -> Tuple[int, ...]:
+    """Identify the current content of a file for caching. Replacing the
+    file changes the inode or the ctime, and unlike mtime, ctime cannot be
+    preserved by tools such as cp -p or rsync -a."""
+    st = os.stat(path)
+    return st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns
+
+
 def shorthand_to_ctx(
     ctxdef: Union[None, ssl.SSLContext, dict, str]
 ) -> Optional[ssl.SSLContext]:
     """Convert an ssl argument shorthand to an SSLContext object."""
     if ctxdef is None or isinstance(ctxdef, ssl.SSLContext):
         return ctxdef
-    if isinstance(ctxdef, str):
-        return load_cert_dir(ctxdef)
-    if isinstance(ctxdef, dict):
-        return CertSimple(**ctxdef)
+    # Walking the MRO also accepts subclasses such as OrderedDict
+    for t in type(ctxdef).__mro__:
+        convert = _SHORTHAND_DISPATCH.get(t)
+        if convert:
+            return convert(ctxdef)
     raise ValueError(
         f"Invalid ssl argument {type(ctxdef)}."
         " Expecting a list of certdirs, a dict or an SSLContext."
@@ -54,26 +96,33 @@ def process_to_context(
     ssldef: Union[None, ssl.SSLContext, dict, str, list, tuple]
 ) -> Optional[ssl.SSLContext]:
     """Process app.run ssl argument from easy formats to full SSLContext."""
-    return (
-        CertSelector(map(shorthand_to_ctx, ssldef))
-        if isinstance(ssldef, (list, tuple))
-        else shorthand_to_ctx(ssldef)
-    )
+    if not isinstance(ssldef, (list, tuple)):
+        return shorthand_to_ctx(ssldef)
+    if len(ssldef) < 2:
+        return CertSelector(map(shorthand_to_ctx, ssldef))
+    # Load certificates in parallel; OpenSSL releases the GIL
+    with ThreadPoolExecutor() as executor:
+        return CertSelector(executor.map(shorthand_to_ctx, ssldef))
 
 
 def load_cert_dir(p: str) -> ssl.SSLContext:
-    if os.path.isfile(p):
-        raise ValueError(f"Certificate folder expected but {p} is a file.")
+    try:
+        with os.scandir(p) as it:
+            entries = {e.name: e for e in it}
+    except NotADirectoryError:
+        raise ValueError(
+            f"Certificate folder expected but {p} is a file."
+        ) from None
+    except (FileNotFoundError, PermissionError):
+        entries = {}
     keyfile = os.path.join(p, "privkey.pem")
     certfile = os.path.join(p, "fullchain.pem")
-    if not os.access(keyfile, os.R_OK):
-        raise ValueError(
-            f"Certificate not found or permission denied {keyfile}"
-        )
-    if not os.access(certfile, os.R_OK):
-        raise ValueError(
-            f"Certificate not found or permission denied {certfile}"
-        )
+    for name, path in (("privkey.pem", keyfile), ("fullchain.pem", certfile)):
+        entry = entries.get(name)
+        if not entry or not entry.is_file():
+            raise ValueError(
+                f"Certificate not found or permission denied {path}"
+            )
     return CertSimple(certfile, keyfile)
 
 
@@ -87,29 +136,44 @@ class CertSimple(ssl.SSLContext):
         password = kw.pop("password", None)
         if not certfile or not keyfile:
             raise ValueError("SSL dict needs filenames for cert and key.")
-        subject = {}
+        subject: Dict[str, str] = {}
         if "names" not in kw:
-            cert = ssl._ssl._test_decode_cert(certfile)  # type: ignore
-            kw["names"] = [
-                name
-                for t, name in cert["subjectAltName"]
-                if t in ["DNS", "IP Address"]
-            ]
-            subject = {k: v for item in cert["subject"] for k, v in item}
+            certpath = os.path.abspath(certfile)
+            names, subject_fields = _parse_cert(certpath, _stat_key(certpath))
+            kw["names"] = list(names)
+            subject = dict(subject_fields)
+        sanic = {**subject, **kw}
         self = create_context(certfile, keyfile, password)
         self.__class__ = cls
-        self.sanic = {**subject, **kw}
+        self.sanic = sanic
         return self
 
     def __init__(self, cert, key, **kw):
         pass  # Do not call super().__init__ because it is already initialized
 
 
+# Converters used by shorthand_to_ctx, by the type of the shorthand
+_SHORTHAND_DISPATCH: Dict[type, Callable[[Any], ssl.SSLContext]] = {
+    str: load_cert_dir,
+    dict: lambda ctxdef: CertSimple(**ctxdef),
+}
+
+
+class _SNIRejection:
+    """A cached find_cert failure, stored in place of a context."""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+
 class CertSelector(ssl.SSLContext):
     """Automatically select SSL certificate based on the hostname that the
     client is trying to access, via SSL SNI. Paths to certificate folders
     with privkey.pem and fullchain.pem in them should be provided, and
     will be matched in the order given whenever there is a new connection.
+    Exact hostnames take precedence over wildcard names.
     """
 
     def __new__(cls, ctxs):
@@ -118,17 +182,32 @@ class CertSelector(ssl.SSLContext):
     def __init__(self, ctxs: Iterable[Optional[ssl.SSLContext]]):
         super().__init__()
         self.sni_callback = selector_sni_callback  # type: ignore
-        self.sanic_select = []
         self.sanic_fallback = None
+        # Lookup tables for find_cert, so that the SNI callback does not
+        # need to walk through all names of all certificates.
+        self.sanic_exact: Dict[str, ssl.SSLContext] = {}
+        self.sanic_wild: Dict[str, ssl.SSLContext] = {}
+        # Results of find_cert (or its failure) by server name
+        self.sanic_sni_cache: Dict[
+            Optional[str], Union[ssl.SSLContext, _SNIRejection]
+        ] = {}
         all_names = []
+        select = []
         for i, ctx in enumerate(ctxs):
             if not ctx:
                 continue
-            names = dict(getattr(ctx, "sanic", {})).get("names", [])
+            names = getattr(ctx, "sanic", _EMPTY_SANIC).get("names", ())
             all_names += names
-            self.sanic_select.append(ctx)
+            select.append(ctx)
             if i == 0:
                 self.sanic_fallback = ctx
+            for name in names:
+                name = name.lower()
+                if name.startswith("*."):
+                    self.sanic_wild.setdefault(name[2:], ctx)
+                else:
+                    self.sanic_exact.setdefault(name, ctx)
+        self.sanic_select = tuple(select)
         if not all_names:
             raise ValueError(
                 "No certificates with SubjectAlternativeNames found."
@@ -147,9 +226,14 @@ def find_cert(self: CertSelector, server_name: str):
         raise ValueError(
             "The client provided no SNI to match for certificate."
         )
-    for ctx in self.sanic_select:
-        if match_hostname(ctx, server_name):
-            return ctx
+    hostname = server_name.lower()
+    ctx = self.sanic_exact.get(hostname)
+    if not ctx:
+        # A wildcard only covers a single label, so one lookup is enough
+        suffix = hostname.partition(".")[2]
+        ctx = self.sanic_wild.get(suffix) if suffix else None
+    if ctx:
+        return ctx
     if self.sanic_fallback:
         return self.sanic_fallback
     raise ValueError(f"No certificate found matching hostname {server_name!r}")
@@ -161,7 +245,7 @@ def match_hostname(
     """Match names from CertSelector against a received hostname."""
     # Local certs are considered trusted, so this can be less pedantic
     # and thus faster than the deprecated ssl.match_hostname function is.
-    names = dict(getattr(ctx, "sanic", {})).get("names", [])
+    names = getattr(ctx, "sanic", _EMPTY_SANIC).get("names", ())
     hostname = hostname.lower()
     for name in names:
         if name.startswith("*."):
@@ -178,14 +262,27 @@ def selector_sni_callback(
     """Select a certificate matching the SNI."""
     # Call server_name_callback to store the SNI on sslobj
     server_name_callback(sslobj, server_name, ctx)
-    # Find a new context matching the hostname
+    # Hostnames are case-insensitive
+    if server_name:
+        server_name = server_name.lower()
+    # Find a new context matching the hostname, unless already known
+    cache = ctx.sanic_sni_cache
     try:
-        sslobj.context = find_cert(ctx, server_name)
-    except ValueError as e:
-        logger.warning(f"Rejecting TLS connection: {e}")
+        found = cache[server_name]
+    except KeyError:
+        try:
+            found = find_cert(ctx, server_name)
+        except ValueError as e:
+            found = _SNIRejection(str(e))
+        if len(cache) >= SNI_CACHE_SIZE:
+            del cache[next(iter(cache))]  # Evict the oldest entry
+        cache[server_name] = found
+    if isinstance(found, _SNIRejection):
+        logger.warning(f"Rejecting TLS connection: {found.message}")
         # This would show ERR_SSL_UNRECOGNIZED_NAME_ALERT on client side if
         # asyncio/uvloop did proper SSL shutdown. They don't.
         return ssl.ALERT_DESCRIPTION_UNRECOGNIZED_NAME
+    sslobj.context = found
     return None  # mypy complains without explicit return
 
 
@@ -4,6 +4,7 @@ import ssl
 import uuid
 
 from contextlib import contextmanager
+from types import SimpleNamespace
 from urllib.parse import urlparse
 
 import pytest
@@ -14,6 +15,11 @@ from sanic import Sanic
 from sanic.compat import OS_IS_WINDOWS
 from sanic.log import logger
 from sanic.response import text
+from sanic.tls import (
+    find_cert,
+    process_to_context,
+    selector_sni_callback,
+)
 
 
 current_dir = os.path.dirname(os.path.realpath(__file__))
@@ -376,3 +382,64 @@ def test_logger_vhosts(caplog):
     assert logmsg == (
         "Certificate vhosts: localhost, 127.0.0.1, 0:0:0:0:0:0:0:1, sanic.example, www.sanic.example, *.sanic.test, 2001:DB8:0:0:0:0:0:541C"
     )
+
+
+def test_exact_name_before_wildcard():
+    selector = process_to_context(
+        [
+            {"cert": sanic_cert, "key": sanic_key, "names": ["*.sanic.test"]},
+            {
+                "cert": localhost_cert,
+                "key": localhost_key,
+                "names": ["FOO.sanic.test"],
+            },
+        ]
+    )
+    wild, exact = selector.sanic_select
+    assert selector.sanic_fallback is wild
+
+    assert find_cert(selector, "foo.sanic.test") is exact
+    assert find_cert(selector, "Bar.Sanic.Test") is wild
+    assert find_cert(selector, "sub.bar.sanic.test") is wild  # fallback
+
+
+def test_cert_context_not_shared():
+    ssl_dict = {"cert": localhost_cert, "key": localhost_key}
+    ctx = process_to_context(ssl_dict)
+    ctx.verify_mode = ssl.CERT_REQUIRED
+    other = process_to_context(dict(ssl_dict))
+
+    assert other is not ctx
+    assert other.verify_mode == ssl.CERT_NONE
+    assert other.sanic == ctx.sanic
+
+
+def test_sni_callback_cache(caplog):
+    selector = process_to_context([None, sanic_dir])
+    sslobj = SimpleNamespace(context=selector)
+
+    assert selector_sni_callback(sslobj, "WWW.sanic.example", selector) is None
+    assert sslobj.context is selector.sanic_select[0]
+    assert sslobj.sanic_server_name == "WWW.sanic.example"
+    assert "www.sanic.example" in selector.sanic_sni_cache
+
+    for _ in range(2):
+        with caplog.at_level(logging.WARNING):
+            result = selector_sni_callback(sslobj, "invalid.test", selector)
+        assert result == ssl.ALERT_DESCRIPTION_UNRECOGNIZED_NAME
+        assert "Rejecting TLS connection" in caplog.text
+        caplog.clear()
+    assert list(selector.sanic_sni_cache) == [
+        "www.sanic.example",
+        "invalid.test",
+    ]
+
+
+def test_cert_names_not_shared():
+    ssl_dict = {"cert": localhost_cert, "key": localhost_key}
+    ctx = process_to_context(ssl_dict)
+    ctx.sanic["names"].append("mutated.test")
+    other = process_to_context(dict(ssl_dict))
+
+    assert other.sanic["names"] is not ctx.sanic["names"]
+    assert "mutated.test" not in other.sanic["names"]